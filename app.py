@@ -2,7 +2,12 @@ import streamlit as st
 import json
 import re
 import os
-from groq import Groq
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from artifact_store import get_text, put_text
+from context_builder import build_context, build_session_context
+from llm_backends import BACKENDS, GROQ_MODEL, LLMCallError, get_backend
+from preview_server import preview_url, start_preview_server
 
 # ─────────────────────────────────────────────
 # CONFIG
@@ -14,10 +19,50 @@ st.set_page_config(page_title="Builder School in a Box", page_icon="🚀", layou
 # ─────────────────────────────────────────────
 # API KEY — paste your Groq key here
 # ─────────────────────────────────────────────
-GROQ_API_KEY = "enter you key "   # ← replace this with your actual key
-
-client = Groq(api_key=GROQ_API_KEY)
-MODEL = "llama-3.3-70b-versatile"   # best free model on Groq — 70B, fast, great at JSON
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "enter you key ")   # ← replace this with your actual key (or set GROQ_API_KEY)
+
+MODEL = GROQ_MODEL
+
+# Which backend serves each stage: "groq" (cloud) or "local" (OpenAI-compatible server
+# on CPU, see llm_backends.py). Override per stage, e.g.
+#   LLM_STAGE_BACKENDS="mentor_questions=local,mentor_response=local"
+STAGE_BACKENDS = {stage: "groq" for stage in [
+    "refinement", "mentor_questions", "mentor_response",
+    "readiness_score", "improved_blueprint", "prototype",
+]}
+
+# Backend to retry on when a stage's backend is rate-limited or down (e.g. "local"); empty = none
+LLM_FALLBACK = os.getenv("LLM_FALLBACK", "")
+
+# Typos fail here, once, instead of silently (stage) or mid-session (backend)
+config_errors = []
+for pair in filter(None, os.getenv("LLM_STAGE_BACKENDS", "").split(",")):
+    stage_name, _, backend_name = (part.strip() for part in pair.partition("="))
+    if stage_name not in STAGE_BACKENDS:
+        config_errors.append(f"unknown stage {stage_name!r}")
+    elif backend_name not in BACKENDS:
+        config_errors.append(f"unknown backend {backend_name!r} for {stage_name}")
+    else:
+        STAGE_BACKENDS[stage_name] = backend_name
+if LLM_FALLBACK and LLM_FALLBACK not in BACKENDS:
+    config_errors.append(f"unknown LLM_FALLBACK backend {LLM_FALLBACK!r}")
+if config_errors:
+    st.error(f"❌ Invalid LLM_STAGE_BACKENDS / LLM_FALLBACK: {'; '.join(config_errors)}. "
+             f"Stages: {', '.join(STAGE_BACKENDS)}. Backends: {', '.join(BACKENDS)}.")
+    st.stop()
+
+# Fused mode: Stage 2 returns the refinement AND the mentor questions in one call,
+# so Stage 3 opens instantly instead of paying a second round trip.
+FUSED_REFINEMENT = os.getenv("FUSED_REFINEMENT", "0") == "1"
+
+# Opt-in: serve HTML prototype previews from the cached preview endpoint at this
+# browser-reachable URL (e.g. https://school.example/preview-proxy, same origin behind
+# the app's proxy). Unset = embed the HTML inline.
+PREVIEW_PUBLIC_URL = os.getenv("PREVIEW_PUBLIC_URL", "")
+
+# Mentor review mode: "sequential" = one answer + feedback at a time,
+# "batched" = answer all 3 questions in one form, feedback generated concurrently.
+MENTOR_REVIEW_MODE = os.getenv("MENTOR_REVIEW_MODE", "sequential")
 
 # Sidebar — only progress tracker, no key input
 with st.sidebar:
@@ -32,8 +77,9 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 ALL_KEYS = ["stage", "idea", "student_class", "idea_type",
             "structured_output", "mentor_questions", "mentor_answers",
-            "mentor_responses", "prototype_code", "current_question_idx",
-            "readiness_score", "improved_blueprint"]
+            "mentor_responses", "prototype_ref", "current_question_idx",
+            "readiness_score", "improved_blueprint", "score_recorded",
+            "session_context", "session_id", "mentor_batch"]
 
 for key in ALL_KEYS:
     if key not in st.session_state:
@@ -64,52 +110,98 @@ def reset_from_stage(from_stage: int):
     if from_stage <= 2:
         st.session_state.structured_output = None
     if from_stage <= 3:
+        st.session_state.session_context = None
+        st.session_state.mentor_batch = None
         st.session_state.mentor_questions = None
         st.session_state.mentor_answers = []
         st.session_state.mentor_responses = []
         st.session_state.current_question_idx = 0
     if from_stage <= 4:
-        st.session_state.prototype_code = None
+        st.session_state.prototype_ref = None
         st.session_state.readiness_score = None
         st.session_state.improved_blueprint = None
+        st.session_state.score_recorded = None
+
+
+def restart_batched_qa():
+    """Button callback: clear the batched Q&A form and any feedback already received."""
+    st.session_state.mentor_batch = None
+    for key in [k for k in st.session_state if str(k).startswith("batch_answer_")]:
+        del st.session_state[key]
 
 
 # ─────────────────────────────────────────────
-# LLM CORE — GROQ
+# LLM CORE — GROQ + LOCAL BACKENDS
 # ─────────────────────────────────────────────
-def call_groq(system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
-    """Central Groq call with error handling."""
+def backend(name: str):
+    settings = {"api_key": GROQ_API_KEY, "model": MODEL} if name == "groq" else {}
+    return get_backend(name, **settings)
+
+
+def is_transient_llm_error(e: Exception) -> bool:
+    err = str(e).lower()
+    return any(s in err for s in ("429", "rate", "quota", "503", "unavailable", "timed out", "connect"))
+
+
+def llm_complete(system_prompt: str, user_message: str, max_tokens: int = 2000,
+                 stage: str = "refinement") -> str:
+    """
+    Raw LLM call on the backend configured for `stage` — raises LLMCallError naming
+    the backend that failed. Rate limits / outages retry once on LLM_FALLBACK if set.
+    Safe to run from worker threads (no st.* calls).
+    """
+    primary = STAGE_BACKENDS.get(stage, "groq")
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            max_tokens=max_tokens,
-            temperature=0.7,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user",   "content": user_message}
-            ]
-        )
-        return response.choices[0].message.content
+        return backend(primary).complete(system_prompt, user_message, max_tokens)
+    except Exception as e:
+        if not LLM_FALLBACK or LLM_FALLBACK == primary or not is_transient_llm_error(e):
+            raise LLMCallError(primary, e) from e
+    try:
+        return backend(LLM_FALLBACK).complete(system_prompt, user_message, max_tokens)
+    except Exception as e:
+        raise LLMCallError(LLM_FALLBACK, e) from e
+
 
+def call_groq(system_prompt: str, user_message: str, max_tokens: int = 2000,
+              stage: str = "refinement") -> str:
+    """Central LLM call with error handling (Groq unless the stage is routed elsewhere)."""
+    try:
+        return llm_complete(system_prompt, user_message, max_tokens, stage)
     except Exception as e:
-        err = str(e).lower()
-        if "401" in err or "invalid" in err or "api key" in err or "auth" in err:
-            st.error("❌ Invalid API key. Check what you entered in the sidebar.")
-        elif "429" in err or "rate" in err or "quota" in err:
-            st.error("⏳ Rate limit hit. Wait a few seconds and try again.")
-        elif "503" in err or "unavailable" in err:
-            st.error("⚠️ Groq service temporarily unavailable. Try again in a moment.")
-        else:
-            st.error(f"❌ Error: {e}")
-        st.stop()
+        report_llm_error(e)
+
+
+def report_llm_error(e: Exception):
+    """Show a friendly message, naming the backend that failed, and stop the run."""
+    name = getattr(e, "backend", "groq")
+    cause = getattr(e, "error", e)
+    label = BACKENDS[name].label if name in BACKENDS else name
+    err = str(cause).lower()
+    if "401" in err or "invalid" in err or "api key" in err or "auth" in err:
+        hint = " Check GROQ_API_KEY (or the key in app.py)." if name == "groq" else ""
+        st.error(f"❌ {label} rejected the API key.{hint}")
+    elif "429" in err or "rate" in err or "quota" in err:
+        st.error(f"⏳ {label} rate limit hit. Wait a few seconds and try again.")
+    elif any(s in err for s in ("503", "unavailable", "connect", "timed out")):
+        st.error(f"⚠️ {label} is temporarily unavailable. Try again in a moment.")
+    else:
+        st.error(f"❌ {label} error: {cause}")
+    st.stop()
+
+
+# Compiled once at import, not on every parse
+FENCE_JSON_RE = re.compile(r"```json\s*")
+FENCE_RE = re.compile(r"```\s*")
+JSON_START_RE = re.compile(r"[\[{]")
+SECTION_SPLIT_RE = re.compile(r"(## SECTION \d+[^\n]*)")
 
 
 def extract_json(text: str) -> str:
     """Strip all markdown fences and extract only the JSON object/array."""
     text = text.strip()
-    text = re.sub(r"```json\s*", "", text)
-    text = re.sub(r"```\s*", "", text)
-    match = re.search(r"[\[{]", text)
+    text = FENCE_JSON_RE.sub("", text)
+    text = FENCE_RE.sub("", text)
+    match = JSON_START_RE.search(text)
     if match:
         text = text[match.start():]
     last = max(text.rfind("}"), text.rfind("]"))
@@ -119,15 +211,28 @@ def extract_json(text: str) -> str:
 
 
 # ─────────────────────────────────────────────
-# STAGE 2: STRUCTURED REFINEMENT
+# CONTEXT BUILDER — token-budgeted stage prompts
 # ─────────────────────────────────────────────
-def get_structured_idea(idea: str, student_class: str, idea_type: str) -> dict:
-    system = f"""You are an expert startup mentor for school students (classes 6-12).
-Analyze the startup idea and return ONLY a valid JSON object.
-No markdown, no code fences, no text before or after the JSON.
+# Budget rules live in context_builder.py; this keeps one copy per session.
+def session_context(idea: str, structured: dict, mentor_answers: list = None,
+                    mentor_responses: list = None) -> dict:
+    """
+    Canonical context cached in session state — rebuilt only when the mentor thread
+    grows or reset_from_stage() clears it.
+    """
+    n_answers = len(mentor_responses or [])
+    cached = st.session_state.session_context
+    if cached is None or cached["n_answers"] != n_answers:
+        cached = {"n_answers": n_answers,
+                  "fields": build_session_context(idea, structured, mentor_answers, mentor_responses)}
+        st.session_state.session_context = cached
+    return cached["fields"]
 
-Return exactly this structure:
-{{
+
+# ─────────────────────────────────────────────
+# STAGE 2: STRUCTURED REFINEMENT
+# ─────────────────────────────────────────────
+REFINEMENT_SCHEMA = """{
   "problem_statement": "2-3 sentences describing the specific real-world problem",
   "target_user": "named specific user group (e.g. 'Class 9-10 students who miss assignment deadlines')",
   "core_features": [
@@ -137,20 +242,36 @@ Return exactly this structure:
   ],
   "revenue_model": "one simple realistic revenue mechanism for a school-level startup",
   "five_day_plan": [
-    {{"day": 1, "task": "specific task"}},
-    {{"day": 2, "task": "specific task"}},
-    {{"day": 3, "task": "specific task"}},
-    {{"day": 4, "task": "specific task"}},
-    {{"day": 5, "task": "specific task"}}
+    {"day": 1, "task": "specific task"},
+    {"day": 2, "task": "specific task"},
+    {"day": 3, "task": "specific task"},
+    {"day": 4, "task": "specific task"},
+    {"day": 5, "task": "specific task"}
   ]
-}}
+}"""
+
+MENTOR_QUESTION_RULES = """DO NOT ask generic questions like "Have you done market research?".
+Make each question specific to this exact idea, targeting:
+- Q1: How they will validate demand BEFORE building anything
+- Q2: What makes this different from existing alternatives
+- Q3: Who exactly will pay, how much, and why"""
+
+
+def get_structured_idea(idea: str, student_class: str, idea_type: str) -> dict:
+    system = f"""You are an expert startup mentor for school students (classes 6-12).
+Analyze the startup idea and return ONLY a valid JSON object.
+No markdown, no code fences, no text before or after the JSON.
+
+Return exactly this structure:
+{REFINEMENT_SCHEMA}
 
 Rules:
 - Use Class {student_class} level language — clear, no jargon
 - Be specific to THIS exact idea, not generic startup advice
 - Output ONLY the JSON object, nothing else"""
 
-    raw = call_groq(system, f"Idea: {idea}\nType: {idea_type}\nClass: {student_class}", max_tokens=1200)
+    raw = call_groq(system, f"Idea: {idea}\nType: {idea_type}\nClass: {student_class}", max_tokens=1200,
+                    stage="refinement")
     try:
         return json.loads(extract_json(raw))
     except json.JSONDecodeError as e:
@@ -158,29 +279,64 @@ Rules:
         st.stop()
 
 
+def get_structured_idea_with_questions(idea: str, student_class: str, idea_type: str) -> tuple:
+    """
+    Fused Stage 2 + Stage 3 call: one completion returns the structured refinement
+    AND the 3 mentor questions, so the mentor session opens without another round trip.
+    Returns (structured, questions).
+    """
+    system = f"""You are an expert startup mentor for school students (classes 6-12).
+First analyze the startup idea, then write exactly 3 sharp follow-up questions that
+expose real gaps in the student's thinking about it.
+Return ONLY a valid JSON object. No markdown, no code fences, no text before or after the JSON.
+
+Return exactly this structure:
+{{
+  "refinement": {REFINEMENT_SCHEMA},
+  "mentor_questions": ["Question 1?", "Question 2?", "Question 3?"]
+}}
+
+Refinement rules:
+- Use Class {student_class} level language — clear, no jargon
+- Be specific to THIS exact idea, not generic startup advice
+
+Mentor question rules:
+{MENTOR_QUESTION_RULES}
+- Base the questions on the refinement you just wrote
+
+Output ONLY the JSON object, nothing else"""
+
+    raw = call_groq(system, f"Idea: {idea}\nType: {idea_type}\nClass: {student_class}", max_tokens=1600,
+                    stage="refinement")
+    try:
+        data = json.loads(extract_json(raw))
+    except json.JSONDecodeError as e:
+        st.error(f"JSON parse failed.\n\nRaw output:\n{raw}\n\nError: {e}")
+        st.stop()
+
+    structured = data.get("refinement") if isinstance(data, dict) else None
+    questions = data.get("mentor_questions") if isinstance(data, dict) else None
+    if not isinstance(structured, dict) or not isinstance(questions, list) or len(questions) != 3:
+        st.error(f"Combined refinement + questions output had the wrong shape.\n\nRaw output:\n{raw}")
+        st.stop()
+    return structured, questions
+
+
 # ─────────────────────────────────────────────
 # STAGE 3: MENTOR QUESTIONS + RESPONSE
 # ─────────────────────────────────────────────
 def get_mentor_questions(idea: str, structured: dict) -> list:
-    system = """You are a sharp startup mentor for a school student.
+    system = f"""You are a sharp startup mentor for a school student.
 Generate exactly 3 targeted follow-up questions that expose real gaps in their thinking.
 
-DO NOT ask generic questions like "Have you done market research?".
-Make each question specific to this exact idea, targeting:
-- Q1: How they will validate demand BEFORE building anything
-- Q2: What makes this different from existing alternatives
-- Q3: Who exactly will pay, how much, and why
+{MENTOR_QUESTION_RULES}
 
 Return ONLY a JSON array of exactly 3 strings. No markdown, no extra text.
 Format: ["Question 1?", "Question 2?", "Question 3?"]"""
 
-    user = f"""Idea: {idea}
-Problem: {structured['problem_statement']}
-Target user: {structured['target_user']}
-Revenue model: {structured['revenue_model']}
-Features: {', '.join(structured['core_features'])}"""
+    user = build_context("mentor_questions", session_context(idea, structured))
 
-    raw = call_groq(system, user, max_tokens=400)
+    raw = call_groq(system, user, max_tokens=400, stage="mentor_questions")
     try:
         return json.loads(extract_json(raw))
     except json.JSONDecodeError as e:
@@ -188,17 +344,37 @@ Features: {', '.join(structured['core_features'])}"""
         st.stop()
 
 
-def get_mentor_response(question: str, answer: str, idea: str) -> str:
-    system = """You are a mentor giving honest feedback on a school student's startup answer.
+MENTOR_FEEDBACK_SYSTEM = """You are a mentor giving honest feedback on a school student's startup answer.
 Write exactly 3 sentences:
 1. What is strong about their answer
 2. The critical gap or weakness you see
 3. One concrete next step they should take this week
 Be direct. Do not sugarcoat. Write in prose, no bullet points."""
 
-    return call_groq(system,
+
+def get_mentor_response(question: str, answer: str, idea: str) -> str:
+    return call_groq(MENTOR_FEEDBACK_SYSTEM,
                      f"Startup: {idea}\nQuestion: {question}\nStudent answer: {answer}",
-                     max_tokens=250)
+                     max_tokens=250, stage="mentor_response")
+
+
+def iter_mentor_responses(questions: list, answers: list, idea: str, indices: list = None):
+    """
+    Batched review: request feedback for the answers at `indices` (default: all) concurrently.
+    Yields (question_index, feedback, error) in the order the calls finish — error is None on
+    success, so one failed call never throws away the feedback that did arrive.
+    """
+    indices = list(range(len(questions))) if indices is None else indices
+    with ThreadPoolExecutor(max_workers=max(len(indices), 1)) as pool:
+        futures = {
+            pool.submit(llm_complete, MENTOR_FEEDBACK_SYSTEM,
+                        f"Startup: {idea}\nQuestion: {questions[i]}\nStudent answer: {answers[i]}",
+                        250, "mentor_response"): i
+            for i in indices
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
 
 
 # ─────────────────────────────────────────────
@@ -209,10 +385,6 @@ def get_readiness_score(idea: str, structured: dict, mentor_answers: list, mento
     After mentor session, evaluate the startup across 4 dimensions.
     Returns a dict with scores + overall + short verdict.
     """
-    answers_text = ""
-    for i, (a, r) in enumerate(zip(mentor_answers, mentor_responses), 1):
-        answers_text += f"Q{i} Answer: {a}\nMentor Feedback: {r}\n\n"
-
     system = """You are a startup evaluator scoring a school student's startup idea.
 Based on the idea details and how the student answered mentor questions, return ONLY a valid JSON object.
 No markdown, no code fences, no text before or after.
@@ -235,16 +407,10 @@ Scoring rules:
 - Be honest, not encouraging — judges will read this
 - Output ONLY the JSON object"""
 
-    user = f"""Startup: {idea}
-Problem: {structured['problem_statement']}
-Target user: {structured['target_user']}
-Revenue model: {structured['revenue_model']}
-Features: {', '.join(structured['core_features'])}
-
-Student's mentor session answers:
-{answers_text}"""
+    user = build_context("readiness_score",
+                         session_context(idea, structured, mentor_answers, mentor_responses))
 
-    raw = call_groq(system, user, max_tokens=500)
+    raw = call_groq(system, user, max_tokens=500, stage="readiness_score")
     try:
         return json.loads(extract_json(raw))
     except json.JSONDecodeError as e:
@@ -260,10 +426,6 @@ def get_improved_blueprint(idea: str, structured: dict, mentor_answers: list, me
     After mentor session + scoring, regenerate an improved version of the startup
     incorporating mentor insights. This shows the iteration/learning loop.
     """
-    answers_text = ""
-    for i, (a, r) in enumerate(zip(mentor_answers, mentor_responses), 1):
-        answers_text += f"Q{i} — Student said: {a} | Mentor noted: {r}\n"
-
     system = """You are a startup mentor creating an IMPROVED version of a student's startup idea.
 Based on the original idea + mentor session insights, generate a refined blueprint.
 Return ONLY a valid JSON object. No markdown, no fences, no extra text.
@@ -287,17 +449,11 @@ Rules:
 - Be specific — show that answers influenced the output
 - Output ONLY the JSON object"""
 
-    user = f"""Original idea: {idea}
-Original problem: {structured['problem_statement']}
-Original features: {', '.join(structured['core_features'])}
-Original revenue: {structured['revenue_model']}
-
-Mentor session insights:
-{answers_text}
+    fields = session_context(idea, structured, mentor_answers, mentor_responses)
+    user = build_context("improved_blueprint",
+                         dict(fields, weakest_area=score.get("biggest_risk", "differentiation")))
 
-Weakest area (from scoring): {score.get('biggest_risk', 'differentiation')}"""
-
-    raw = call_groq(system, user, max_tokens=800)
+    raw = call_groq(system, user, max_tokens=800, stage="improved_blueprint")
     try:
         return json.loads(extract_json(raw))
     except json.JSONDecodeError as e:
@@ -309,12 +465,8 @@ Weakest area (from scoring): {score.get('biggest_risk', 'differentiation')}"""
 # STAGE 4: PROTOTYPE GENERATOR
 # ─────────────────────────────────────────────
 def get_prototype(idea: str, idea_type: str, structured: dict) -> str:
-    features_str = "\n".join(f"- {f}" for f in structured["core_features"])
-    context = f"""Startup: {idea}
-Problem: {structured['problem_statement']}
-Target user: {structured['target_user']}
-Core features:
-{features_str}"""
+    context = build_context("prototype", session_context(
+        idea, structured, st.session_state.mentor_answers, st.session_state.mentor_responses))
 
     if idea_type == "App or Website":
         system = """Generate a complete self-contained HTML landing page for a student startup.
@@ -373,16 +525,34 @@ JSON responses, basic input validation, SQLite setup.
 
 Output ONLY code with the three section headers. No other explanation."""
 
-    return call_groq(system, context, max_tokens=3500)
+    return call_groq(system, context, max_tokens=3500, stage="prototype")
 
 
 # ─────────────────────────────────────────────
 # SESSION EXPORT — builds full JSON snapshot
 # ─────────────────────────────────────────────
-def build_session_export() -> dict:
+def load_prototype_code():
+    """Prototype text from the artifact store, or None if not generated (or the blob is gone)."""
+    ref = st.session_state.prototype_ref
+    if ref is None:
+        return None
+    try:
+        return get_text(ref)
+    except FileNotFoundError:
+        return None
+
+
+@st.cache_resource
+def preview_base_url():
+    """Start the preview server once per process. None → fall back to inline HTML."""
+    return start_preview_server() if PREVIEW_PUBLIC_URL else None
+
+
+def build_session_export(include_code: bool = True) -> dict:
     """
     Collects EVERYTHING from session state into one clean dict.
     Used for JSON download and the summary panel.
+    The prototype is loaded from the artifact store only when include_code is set.
     """
     ss = st.session_state
 
@@ -417,7 +587,7 @@ def build_session_export() -> dict:
             "improved_blueprint": ss.improved_blueprint,
         },
         "step5_prototype": {
-            "code": ss.prototype_code
+            "code": load_prototype_code() if include_code else None
         },
     }
     return export
@@ -432,8 +602,8 @@ def render_session_summary():
     if stage < 2:
         return  # nothing to show yet
 
-    export = build_session_export()
-    export_json = json.dumps(export, indent=2, ensure_ascii=False)
+    # Never loads the prototype — Stage 5 builds the one full export that includes it
+    export = build_session_export(include_code=False)
 
     with st.expander("📋 Full Session Summary — click to review all previous steps", expanded=False):
         # ── Input ───────────────────────────────────
@@ -498,21 +668,52 @@ def render_session_summary():
             st.markdown(f"**Key Improvement:** {bp['key_improvement']}")
 
         # ── Prototype ───────────────────────────────
-        if export["step5_prototype"]["code"]:
+        if st.session_state.prototype_ref:
             st.divider()
             st.markdown("#### 🛠 Prototype")
             st.markdown("✅ Prototype code generated — download it from Step 5.")
 
         # ── Download button ──────────────────────────
         st.divider()
-        st.download_button(
-            label="⬇️ Download Full Session as JSON",
-            data=export_json,
-            file_name="builder_school_session.json",
-            mime="application/json",
-            use_container_width=True,
-            help="Save everything — your idea, refinement, mentor Q&A, score, blueprint, and prototype."
-        )
+        if st.session_state.prototype_ref:
+            st.caption("⬇️ Download the complete journey, including prototype code, from Step 5 below.")
+        else:
+            st.download_button(
+                label="⬇️ Download Full Session as JSON",
+                data=json.dumps(export, indent=2, ensure_ascii=False),
+                file_name="builder_school_session.json",
+                mime="application/json",
+                use_container_width=True,
+                help="Save everything — your idea, refinement, mentor Q&A, score and blueprint."
+            )
+
+
+# ─────────────────────────────────────────────
+# MENTOR THREAD BUBBLES
+# ─────────────────────────────────────────────
+BUBBLE_STYLES = {
+    # kind: (background, border colour, extra css)
+    "question": ("#f0f4ff", "#4f6ef7", ""),
+    "answer":   ("#f6fff6", "#28a745", "margin-left:32px;"),
+    "feedback": ("#fffbf0", "#f0ad00", ""),
+}
+
+
+def bubble_html(kind: str, title: str, body: str, margin_bottom: int = 6) -> str:
+    bg, border, extra = BUBBLE_STYLES[kind]
+    return f"""<div style="background:{bg};border-left:4px solid {border};
+    padding:12px 16px;border-radius:6px;margin-bottom:{margin_bottom}px;{extra}">
+    <strong>{title}</strong><br>{body}</div>"""
+
+
+def batched_retry_controls() -> bool:
+    """Restart / retry buttons shown while batched feedback is incomplete. True if retry was clicked."""
+    col_r, col_s = st.columns([1, 3])
+    with col_r:
+        st.button("↺ Restart Q&A", key="batch_restart", on_click=restart_batched_qa)
+    with col_s:
+        return st.button("↻ Retry Missing Feedback", key="batch_retry", type="primary",
+                         use_container_width=True)
 
 
 # ─────────────────────────────────────────────
@@ -557,6 +758,7 @@ if st.session_state.stage == 1:
             st.error("Please describe your idea before continuing.")
         else:
             reset_from_stage(2)
+            st.session_state.session_id = uuid.uuid4().int & (2**64 - 1)   # one id per idea, kept on re-scores
             st.session_state.idea = idea.strip()
             st.session_state.student_class = student_class
             st.session_state.idea_type = idea_type
@@ -569,11 +771,19 @@ if st.session_state.stage == 1:
 elif st.session_state.stage == 2:
     if st.session_state.structured_output is None:
         with st.spinner("🧠 Analyzing your idea..."):
-            st.session_state.structured_output = get_structured_idea(
-                st.session_state.idea,
-                st.session_state.student_class,
-                st.session_state.idea_type
-            )
+            if FUSED_REFINEMENT:
+                st.session_state.structured_output, st.session_state.mentor_questions = \
+                    get_structured_idea_with_questions(
+                        st.session_state.idea,
+                        st.session_state.student_class,
+                        st.session_state.idea_type
+                    )
+            else:
+                st.session_state.structured_output = get_structured_idea(
+                    st.session_state.idea,
+                    st.session_state.student_class,
+                    st.session_state.idea_type
+                )
 
     s = st.session_state.structured_output
     col1, col2 = st.columns(2)
@@ -600,7 +810,9 @@ elif st.session_state.stage == 2:
             st.rerun()
     with col_b:
         if st.button("Start Mentor Session →", use_container_width=True, type="primary"):
+            fused_questions = st.session_state.mentor_questions if FUSED_REFINEMENT else None
             reset_from_stage(3)
+            st.session_state.mentor_questions = fused_questions   # None → generated in Stage 3
             st.session_state.stage = 3
             st.rerun()
 
@@ -620,31 +832,95 @@ elif st.session_state.stage == 3:
 
     # Threaded conversation display — completed exchanges
     for i in range(min(idx, len(questions))):
-        st.markdown(
-            f"""<div style="background:#f0f4ff;border-left:4px solid #4f6ef7;
-            padding:12px 16px;border-radius:6px;margin-bottom:6px;">
-            <strong>🧑‍🏫 Mentor Q{i+1}:</strong><br>{questions[i]}</div>""",
-            unsafe_allow_html=True)
+        st.markdown(bubble_html("question", f"🧑‍🏫 Mentor Q{i+1}:", questions[i]),
+                    unsafe_allow_html=True)
         if i < len(st.session_state.mentor_answers):
-            st.markdown(
-                f"""<div style="background:#f6fff6;border-left:4px solid #28a745;
-                padding:12px 16px;border-radius:6px;margin-bottom:6px;margin-left:32px;">
-                <strong>🎓 You:</strong><br>{st.session_state.mentor_answers[i]}</div>""",
-                unsafe_allow_html=True)
+            st.markdown(bubble_html("answer", "🎓 You:", st.session_state.mentor_answers[i]),
+                        unsafe_allow_html=True)
         if i < len(st.session_state.mentor_responses):
-            st.markdown(
-                f"""<div style="background:#fffbf0;border-left:4px solid #f0ad00;
-                padding:12px 16px;border-radius:6px;margin-bottom:18px;">
-                <strong>🧑‍🏫 Feedback:</strong><br>{st.session_state.mentor_responses[i]}</div>""",
-                unsafe_allow_html=True)
+            st.markdown(bubble_html("feedback", "🧑‍🏫 Feedback:", st.session_state.mentor_responses[i], 18),
+                        unsafe_allow_html=True)
+
+    # Batched review — all questions answered in one form, feedback generated concurrently.
+    # Answers and any feedback received are kept in mentor_batch, so a failed call is
+    # retried on its own instead of re-sending all three.
+    if MENTOR_REVIEW_MODE == "batched" and idx == 0 and questions:
+        batch = st.session_state.mentor_batch
+        run = False
+        if batch is None:
+            with st.form("mentor_form_batched"):
+                batch_answers = []
+                for i, q in enumerate(questions):
+                    st.markdown(bubble_html("question", f"🧑‍🏫 Mentor Q{i+1} of {len(questions)}:", q, 12),
+                                unsafe_allow_html=True)
+                    batch_answers.append(st.text_area(f"Your Answer to Q{i+1}", height=110, key=f"batch_answer_{i}",
+                                                      placeholder="Be specific — vague answers get tough feedback."))
+                col_r, col_s = st.columns([1, 3])
+                with col_r:
+                    st.form_submit_button("↺ Restart Q&A", on_click=restart_batched_qa)
+                with col_s:
+                    submitted = st.form_submit_button("Submit All Answers →", type="primary",
+                                                      use_container_width=True)
+
+            if submitted:
+                if not all(a.strip() for a in batch_answers):
+                    st.error("Answer every question first.")
+                else:
+                    batch = st.session_state.mentor_batch = {
+                        "answers": [a.strip() for a in batch_answers],
+                        "responses": [None] * len(questions),
+                    }
+                    run = True
+
+        if batch is not None:
+            st.divider()
+            # Same threaded view, with feedback slots filled in as each call returns
+            slots = []
+            for i, (q, a) in enumerate(zip(questions, batch["answers"])):
+                st.markdown(bubble_html("question", f"🧑‍🏫 Mentor Q{i+1}:", q), unsafe_allow_html=True)
+                st.markdown(bubble_html("answer", "🎓 You:", a), unsafe_allow_html=True)
+                slots.append(st.empty())
+                slots[i].markdown(bubble_html("feedback", "🧑‍🏫 Feedback:",
+                                              batch["responses"][i] or "⏳ Mentor is reviewing...", 18),
+                                  unsafe_allow_html=True)
+
+            missing = [i for i, r in enumerate(batch["responses"]) if r is None]
+            controls_shown = False
+            if not run:
+                for i in missing:
+                    slots[i].markdown(bubble_html("feedback", "🧑‍🏫 Feedback:", "⚠️ No feedback yet.", 18),
+                                      unsafe_allow_html=True)
+                run = batched_retry_controls()
+                controls_shown = True
+
+            if run:
+                failed = None
+                for i, resp, err in iter_mentor_responses(questions, batch["answers"], st.session_state.idea,
+                                                          missing):
+                    if err is None:
+                        batch["responses"][i] = resp
+                        slots[i].markdown(bubble_html("feedback", "🧑‍🏫 Feedback:", resp, 18),
+                                          unsafe_allow_html=True)
+                    else:
+                        failed = err
+                        slots[i].markdown(bubble_html("feedback", "🧑‍🏫 Feedback:", "⚠️ No feedback yet.", 18),
+                                          unsafe_allow_html=True)
+
+                if failed is not None:
+                    if not controls_shown:
+                        batched_retry_controls()
+                    report_llm_error(failed)
+
+                st.session_state.mentor_answers = batch["answers"]
+                st.session_state.mentor_responses = batch["responses"]
+                st.session_state.mentor_batch = None
+                st.session_state.current_question_idx = len(questions)
+                st.rerun()
 
     # Active question
-    if idx < len(questions):
-        st.markdown(
-            f"""<div style="background:#f0f4ff;border-left:4px solid #4f6ef7;
-            padding:12px 16px;border-radius:6px;margin-bottom:12px;">
-            <strong>🧑‍🏫 Mentor Q{idx+1} of {len(questions)}:</strong><br>{questions[idx]}</div>""",
-            unsafe_allow_html=True)
+    elif idx < len(questions):
+        st.markdown(bubble_html("question", f"🧑‍🏫 Mentor Q{idx+1} of {len(questions)}:", questions[idx], 12),
+                    unsafe_allow_html=True)
 
         with st.form(f"mentor_form_{idx}"):
             answer = st.text_area("Your Answer", height=110,
@@ -683,6 +959,7 @@ elif st.session_state.stage == 3:
             if st.button("📊 See Score & Improved Blueprint →", use_container_width=True, type="primary"):
                 st.session_state.readiness_score = None
                 st.session_state.improved_blueprint = None
+                st.session_state.score_recorded = None
                 st.session_state.stage = 4
                 st.rerun()
 
@@ -714,6 +991,16 @@ elif st.session_state.stage == 4:
     sc = st.session_state.readiness_score
     bp = st.session_state.improved_blueprint
 
+    # Keep the score for the teacher dashboard — once per scoring, never blocks the student
+    if not st.session_state.score_recorded:
+        from score_store import record_session   # NumPy loads on the first score, not at boot
+        try:
+            record_session(st.session_state.session_id, sc, bp,
+                           st.session_state.student_class, st.session_state.idea_type)
+        except (OSError, ValueError) as e:
+            st.toast(f"Score not saved to class analytics: {e}")
+        st.session_state.score_recorded = True
+
     # ── READINESS SCORE DISPLAY ──────────────────
     st.markdown("### 📊 Startup Readiness Score")
 
@@ -789,7 +1076,7 @@ elif st.session_state.stage == 4:
             st.rerun()
     with col_next:
         if st.button("🛠 Generate Prototype →", use_container_width=True, type="primary"):
-            st.session_state.prototype_code = None
+            st.session_state.prototype_ref = None
             st.session_state.stage = 5
             st.rerun()
 
@@ -799,25 +1086,42 @@ elif st.session_state.stage == 4:
 elif st.session_state.stage == 5:
     idea_type = st.session_state.idea_type
 
-    if st.session_state.prototype_code is None:
+    # Only a content hash lives in session state — the code itself is in the artifact store
+    code = load_prototype_code()
+    if code is None:
         with st.spinner(f"🛠 Building your {idea_type} prototype..."):
-            st.session_state.prototype_code = get_prototype(
+            code = get_prototype(
                 st.session_state.idea,
                 idea_type,
                 st.session_state.structured_output
             )
-
-    code = st.session_state.prototype_code
+        try:
+            st.session_state.prototype_ref = put_text(code)
+        except OSError as e:
+            st.error(f"❌ Could not save the prototype: {e}")
+            st.stop()
     st.success(f"✅ Your **{idea_type}** prototype is ready!")
 
     if idea_type == "App or Website":
+        base_url = preview_base_url()
+        ref = st.session_state.prototype_ref
         tab1, tab2 = st.tabs(["💻 Live Preview", "📄 HTML Source"])
         with tab1:
-            st.components.v1.html(code, height=650, scrolling=True)
+            if base_url:
+                # The iframe carries a URL; the browser caches the page by content hash
+                st.components.v1.iframe(preview_url(base_url, ref), height=650, scrolling=True)
+            else:
+                st.components.v1.html(code, height=650, scrolling=True)
         with tab2:
-            st.code(code, language="html")
-            st.download_button("⬇️ Download landing_page.html", code,
-                               "landing_page.html", "text/html", use_container_width=True)
+            # Both tabs render on every rerun — only the code view waits to be asked for
+            if st.toggle("Show HTML source"):
+                st.code(code, language="html")
+            if base_url:
+                st.link_button("⬇️ Download landing_page.html", preview_url(base_url, ref, download=True),
+                               use_container_width=True)
+            else:
+                st.download_button("⬇️ Download landing_page.html", code,
+                                   "landing_page.html", "text/html", use_container_width=True)
 
     elif idea_type == "AI Tool":
         st.code(code, language="python")
@@ -826,7 +1130,7 @@ elif st.session_state.stage == 5:
                            "ai_tool.py", "text/plain", use_container_width=True)
 
     else:  # Marketplace
-        sections = re.split(r"(## SECTION \d+[^\n]*)", code)
+        sections = SECTION_SPLIT_RE.split(code)
         if len(sections) > 1:
             for i in range(1, len(sections), 2):
                 header = sections[i].strip()
@@ -855,8 +1159,11 @@ elif st.session_state.stage == 5:
     )
 
     # ── Pretty JSON preview ──────────────────────────────────────────────────
+    # Prototype code is already shown above — leave it out instead of shipping it twice
     with st.expander("🔍 Preview raw JSON export", expanded=False):
-        st.code(final_json, language="json")
+        preview = build_session_export(include_code=False)
+        preview["step5_prototype"]["code"] = "… (prototype code — included in the download)"
+        st.code(json.dumps(preview, indent=2, ensure_ascii=False), language="json")
 
     st.divider()
     if st.button("🔁 Start Over with a New Idea", use_container_width=True):
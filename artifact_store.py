@@ -0,0 +1,70 @@
+"""
+Artifact store — large generated outputs live on disk, not in st.session_state.
+
+Blobs are zlib-compressed and content-addressed by SHA-256: a session keeps only
+the 64-character handle, identical outputs from different students are stored
+once, and the text is read back only when a widget actually needs it.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from functools import lru_cache
+
+# Next to this module, so every process finds it whatever directory it starts from
+STORE_DIR = os.getenv("ARTIFACT_STORE_DIR",
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifact_store"))
+HANDLE_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def is_handle(value) -> bool:
+    return isinstance(value, str) and HANDLE_RE.fullmatch(value) is not None
+
+
+def blob_path(handle: str, store_dir: str = STORE_DIR) -> str:
+    """Two-level fan-out (ab/abcdef…) keeps directories small."""
+    if not is_handle(handle):
+        raise ValueError(f"not an artifact handle: {handle!r}")
+    return os.path.join(store_dir, handle[:2], handle)
+
+
+def put_text(text: str, store_dir: str = STORE_DIR) -> str:
+    """Store text once and return its handle. Writing the same text again is a no-op."""
+    data = text.encode("utf-8")
+    handle = hashlib.sha256(data).hexdigest()
+    path = blob_path(handle, store_dir)
+    if os.path.exists(path):
+        return handle
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(tmp, path)   # atomic — readers never see a half-written blob
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return handle
+
+
+def get_compressed(handle: str, store_dir: str = STORE_DIR) -> bytes:
+    """Raw zlib bytes, for serving by reference without decompressing."""
+    with open(blob_path(handle, store_dir), "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=16)
+def _get_text(handle: str, store_dir: str) -> str:
+    return zlib.decompress(get_compressed(handle, store_dir)).decode("utf-8")
+
+
+def get_text(handle: str, store_dir: str = STORE_DIR) -> str:
+    """
+    Load an artifact. A small process-wide cache (shared by all sessions, since
+    handles are content hashes) avoids re-reading the same blob on every rerun.
+    Raises FileNotFoundError if the blob has been removed.
+    """
+    return _get_text(handle, store_dir)
@@ -0,0 +1,157 @@
+"""
+Context builder — token-budgeted user messages for the later LLM stages.
+
+A session's idea, refinement and mentor thread are assembled once into canonical
+fields (build_session_context); each stage then renders only the fields it needs,
+most decision-relevant first, within its own token budget (build_context).
+Pure functions with no Streamlit or network dependency.
+"""
+import re
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Token budget for the user message of each stage (system prompt not included)
+CONTEXT_BUDGETS = {
+    "mentor_questions":   350,
+    "readiness_score":    900,
+    "improved_blueprint": 900,
+    "prototype":          450,
+}
+IDEA_TOKEN_CAP = 150     # max tokens kept of the Stage 1 idea
+ANSWER_TOKEN_CAP = 120   # max tokens kept per mentor answer / feedback
+FIELD_MIN_TOKENS = 24    # every listed field (and every mentor exchange) keeps at least this much
+
+# Fields each stage needs, most decision-relevant first — later fields are trimmed first
+STAGE_FIELDS = {
+    "mentor_questions":   ["idea", "problem", "target_user", "revenue", "features"],
+    "readiness_score":    ["idea", "problem", "mentor_thread", "revenue", "target_user", "features"],
+    "improved_blueprint": ["idea", "mentor_thread", "weakest_area", "problem", "features", "revenue"],
+    "prototype":          ["idea", "problem", "features", "target_user"],
+}
+FIELD_LABELS = {
+    "idea":          "Startup",
+    "problem":       "Problem",
+    "target_user":   "Target user",
+    "revenue":       "Revenue model",
+    "features":      "Core features",
+    "mentor_thread": "Mentor session",
+    "weakest_area":  "Weakest area (from scoring)",
+}
+
+
+def count_tokens(text: str) -> int:
+    """Cheap local token estimate (words + punctuation) — no API call needed."""
+    return len(TOKEN_RE.findall(text or ""))
+
+
+def trim_to_tokens(text: str, budget: int) -> str:
+    """
+    Shorten text to at most `budget` tokens, keeping whole leading sentences where
+    possible. A hard cut ends in " …", which counts toward the budget.
+    """
+    text = (text or "").strip()
+    if budget <= 0:
+        return ""
+    if count_tokens(text) <= budget:
+        return text
+
+    kept, used = [], 0
+    for sentence in SENTENCE_END_RE.split(text):
+        n = count_tokens(sentence)
+        if used + n > budget:
+            break
+        kept.append(sentence)
+        used += n
+    if kept:
+        return " ".join(kept)
+
+    # First sentence alone is over budget — hard cut on a token boundary
+    if budget < 2:
+        return ""   # no room for a token plus the ellipsis
+    cut = list(TOKEN_RE.finditer(text))[budget - 2].end()
+    return text[:cut].rstrip() + " …"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def render_thread(exchanges: list, budget: int = None) -> str:
+    """
+    Render (answer, feedback) pairs as the mentor-session text. With a budget, every
+    exchange gets an equal share, split between the answer and the feedback, so one
+    long exchange cannot push the others out.
+    """
+    exchanges = list(exchanges or [])
+    share = None if budget is None else budget // max(len(exchanges), 1)
+    blocks = []
+    for i, (answer, note) in enumerate(exchanges, 1):
+        head, tail = f"Q{i} — Student said:", "Mentor noted:"
+        if share is not None:
+            room = share - count_tokens(head) - count_tokens(tail)
+            answer = trim_to_tokens(answer, max(room // 2, room - count_tokens(note)))
+            note = trim_to_tokens(note, room - count_tokens(answer))
+        if not answer:
+            continue
+        blocks.append(f"{head} {answer}" + (f"\n{tail} {note}" if note else ""))
+    return "\n\n".join(blocks)
+
+
+def build_session_context(idea: str, structured: dict, mentor_answers: list = None,
+                          mentor_responses: list = None) -> dict:
+    """
+    Assemble the canonical context fields for a session.
+    The idea and each student answer / mentor note are capped here, so no stage
+    prompt can grow without bound. mentor_thread is a list of (answer, feedback) pairs.
+    """
+    thread = [(trim_to_tokens(a, ANSWER_TOKEN_CAP), trim_to_tokens(r, ANSWER_TOKEN_CAP))
+              for a, r in zip(mentor_answers or [], mentor_responses or [])]
+
+    return {
+        "idea":          trim_to_tokens(idea, IDEA_TOKEN_CAP),
+        "problem":       structured.get("problem_statement", ""),
+        "target_user":   structured.get("target_user", ""),
+        "revenue":       structured.get("revenue_model", ""),
+        "features":      "\n".join(f"- {f}" for f in structured.get("core_features", [])),
+        "mentor_thread": thread,
+    }
+
+
+def build_context(stage: str, fields: dict) -> str:
+    """
+    Render the user message for one stage from the canonical fields, within its token budget.
+    Fields are added in priority order and a field is skipped only if its text is identical
+    to an earlier one. Each later field keeps a FIELD_MIN_TOKENS reserve (one per exchange
+    for the mentor thread), so a long field is trimmed to leave room for the rest instead
+    of pushing them out.
+    """
+    entries, seen = [], set()
+    for name in STAGE_FIELDS[stage]:
+        value = fields.get(name)
+        if name == "mentor_thread":
+            text, floor = render_thread(value), FIELD_MIN_TOKENS * max(len(value or []), 1)
+        else:
+            text, floor = (value or "").strip(), FIELD_MIN_TOKENS
+        norm = _normalize(text)
+        if not norm or norm in seen:
+            continue
+        seen.add(norm)
+        label = FIELD_LABELS[name]
+        entries.append((name, value, label, text, count_tokens(label) + count_tokens(text) + 1, floor))
+
+    budget = CONTEXT_BUDGETS[stage]
+    parts = []
+    for i, (name, value, label, text, cost, _) in enumerate(entries):
+        reserve = sum(min(c, floor) for *_, c, floor in entries[i + 1:])
+        available = budget - reserve
+        if cost > available:
+            room = available - count_tokens(label) - 1
+            text = render_thread(value, room) if name == "mentor_thread" else trim_to_tokens(text, room)
+            if not text:
+                continue
+            cost = count_tokens(label) + count_tokens(text) + 1
+        sep = ":\n" if "\n" in text else ": "
+        parts.append(f"{label}{sep}{text}")
+        budget -= cost
+    return "\n".join(parts)
@@ -0,0 +1,153 @@
+"""
+LLM backends — the model providers behind call_groq.
+
+  groq   Groq cloud (default)
+  local  any OpenAI-compatible server on the same machine or LAN, e.g. a small
+         quantized model on CPU via llama.cpp's `llama-server`, Ollama or vLLM
+
+Backends are created once per process and shared by every session (both SDK
+clients pool their HTTP connections and are thread-safe).
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+GROQ_MODEL = "llama-3.3-70b-versatile"   # best free model on Groq — 70B, fast, great at JSON
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL", "http://localhost:8080/v1")   # llama-server default
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "local")
+LOCAL_LLM_TIMEOUT = float(os.getenv("LOCAL_LLM_TIMEOUT", "120"))
+# How long an idle pooled connection stays open. httpx's default is 5 s, which
+# would close the connection warmed at boot long before the first student arrives.
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "300"))
+
+
+def _pool_limits():
+    import httpx
+    return httpx.Limits(max_connections=1000, max_keepalive_connections=100,
+                        keepalive_expiry=LLM_KEEPALIVE_SECONDS)
+
+
+class LLMCallError(Exception):
+    """A backend call failed. `backend` names which one, for user-facing messages."""
+
+    def __init__(self, backend: str, error: Exception):
+        super().__init__(f"{backend}: {error}")
+        self.backend = backend
+        self.error = error
+
+
+class LLMBackend(ABC):
+    """One chat-completion provider. complete() raises on any failure."""
+    name = "base"
+    label = "LLM service"   # how the provider is named in error messages
+
+    @abstractmethod
+    def complete(self, system_prompt: str, user_message: str, max_tokens: int,
+                 temperature: float = 0.7) -> str:
+        """Return the assistant message for one system + user turn."""
+
+    @abstractmethod
+    def warm_up(self):
+        """Open the pooled connection (DNS + TLS) with a cheap request. Raises on failure."""
+
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+    label = "Groq"
+
+    def __init__(self, api_key: str, model: str):
+        import httpx
+        from groq import Groq   # the SDK is only imported when Groq is actually used
+        # Same pool sizes and timeout as the SDK's own default client, longer keep-alive
+        self.client = Groq(api_key=api_key,
+                           http_client=httpx.Client(limits=_pool_limits(), timeout=60.0,
+                                                    follow_redirects=True))
+        self.model = model
+
+    def complete(self, system_prompt, user_message, max_tokens, temperature=0.7):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user",   "content": user_message}
+            ]
+        )
+        return response.choices[0].message.content
+
+    def warm_up(self):
+        self.client.models.list()
+
+
+class LocalBackend(LLMBackend):
+    """OpenAI-compatible /chat/completions endpoint — no API key, no quota."""
+    name = "local"
+    label = f"Local model server ({LOCAL_LLM_URL})"
+
+    def __init__(self, base_url: str = LOCAL_LLM_URL, model: str = LOCAL_LLM_MODEL,
+                 timeout: float = LOCAL_LLM_TIMEOUT):
+        import httpx   # deferred with the rest of the HTTP stack
+        self.client = httpx.Client(base_url=base_url.rstrip("/"), timeout=timeout,
+                                   limits=_pool_limits())
+        self.model = model
+
+    def complete(self, system_prompt, user_message, max_tokens, temperature=0.7):
+        response = self.client.post("/chat/completions", json={
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user",   "content": user_message}
+            ],
+        })
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    def warm_up(self):
+        self.client.get("/models").raise_for_status()
+
+
+BACKENDS = {"groq": GroqBackend, "local": LocalBackend}
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def get_backend(name: str, **settings) -> LLMBackend:
+    """
+    Shared backend instance for `name` + `settings` (so a backend pre-warmed at boot
+    is reused only if it was built with the same key / model).
+    Raises ValueError for an unknown backend name.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown LLM backend {name!r} (choose from {', '.join(BACKENDS)})")
+    key = (name, tuple(sorted(settings.items())))
+    with _lock:
+        if key not in _instances:
+            _instances[key] = BACKENDS[name](**settings)
+        return _instances[key]
+
+
+def prewarm(name: str, tiny_call: bool = False, **settings) -> dict:
+    """
+    Create the shared backend and open its connection ahead of the first student.
+    With tiny_call, also run a 1-token completion (warms the model path; uses quota).
+    Returns timings in milliseconds; raises if the backend cannot be reached.
+    """
+    timings = {}
+    start = time.perf_counter()
+    instance = get_backend(name, **settings)
+    timings["construct_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    instance.warm_up()
+    timings["connect_ms"] = (time.perf_counter() - start) * 1000
+
+    if tiny_call:
+        start = time.perf_counter()
+        instance.complete("Reply with OK.", "ping", max_tokens=1)
+        timings["tiny_call_ms"] = (time.perf_counter() - start) * 1000
+    return timings
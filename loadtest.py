@@ -0,0 +1,284 @@
+"""
+Load-test harness — how many concurrent students can one app.py process serve?
+
+Drives N simulated sessions through the full five-stage flow with Streamlit's
+AppTest, against a mock LLM (the Groq client is patched, so no key or quota is
+used), ramping concurrency level by level. For each level it reports throughput,
+per-interaction latency, rerun CPU time and each session's st.session_state
+footprint, then estimates sessions-per-core capacity for provisioning.
+
+AppTest keeps its runtime in a process-global, so two AppTests in one process
+break each other: every concurrent session runs in its own worker process.
+Capacity is estimated only from levels where every session succeeded, and the
+exit status is 1 if any level had errors.
+
+Usage:
+    python loadtest.py --levels 1,2,4,8,16 --sessions-per-worker 2 --llm-latency 0.5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+from unittest import mock
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+IDEA_TYPES = ["App or Website", "AI Tool", "Marketplace"]
+
+# ─────────────────────────────────────────────
+# MOCK LLM BACKEND
+# ─────────────────────────────────────────────
+REFINEMENT = {
+    "problem_statement": "Students forget homework deadlines. Teachers post them in too many places.",
+    "target_user": "Class 9-10 students who miss assignment deadlines",
+    "core_features": ["Deadline inbox from class groups", "Nightly reminder", "Streak tracker"],
+    "revenue_model": "Schools pay a small yearly fee per class",
+    "five_day_plan": [{"day": d, "task": f"Task for day {d}"} for d in range(1, 6)],
+}
+QUESTIONS = ["How will you test demand?", "Why not just use WhatsApp?", "Who pays and how much?"]
+SCORE = {"problem_clarity": 7, "monetization_clarity": 5, "differentiation": 6, "student_feasibility": 8,
+         "overall": 6.5, "verdict": "Solid start. Monetization is unproven.",
+         "biggest_strength": "Clear pain point", "biggest_risk": "Schools may not pay"}
+BLUEPRINT = {"improved_name": "DueDone", "refined_problem": "Deadlines are scattered. Students miss them.",
+             "pivot_or_sharpen": "Sharpened to Class 9-10", "updated_features": ["A", "B", "C"],
+             "stronger_revenue_model": "Per-class licence", "key_improvement": "Clear payer"}
+FEEDBACK = "Your answer names a real user. It lacks evidence of demand. Interview five classmates this week."
+PROTOTYPE = {
+    "html": "<!DOCTYPE html><html><body>" + "<section>Feature card</section>" * 200 + "</body></html>",
+    "python": "# AI TOOL: Demo\nimport streamlit as st\n" + "st.write('line')\n" * 200,
+    "marketplace": ("## SECTION 1: HTML FRONTEND\n<html></html>\n## SECTION 2: DATABASE SCHEMA\n"
+                    "CREATE TABLE users (id INTEGER PRIMARY KEY);\n## SECTION 3: FLASK API SCAFFOLD\n"
+                    "# pip install flask flask-sqlalchemy\n" + "print('route')\n" * 200),
+}
+
+llm_latency = 0.0   # simulated network + generation time per call, set from --llm-latency
+
+
+def fake_reply(system_prompt: str) -> str:
+    """Pick a canned reply by recognising which stage prompt is calling."""
+    if '"mentor_questions"' in system_prompt:
+        return json.dumps({"refinement": REFINEMENT, "mentor_questions": QUESTIONS})
+    if '"problem_statement"' in system_prompt:
+        return json.dumps(REFINEMENT)
+    if "follow-up questions" in system_prompt:
+        return json.dumps(QUESTIONS)
+    if '"problem_clarity"' in system_prompt:
+        return json.dumps(SCORE)
+    if '"improved_name"' in system_prompt:
+        return json.dumps(BLUEPRINT)
+    if "honest feedback" in system_prompt:
+        return FEEDBACK
+    if "HTML landing page" in system_prompt:
+        return PROTOTYPE["html"]
+    if "Streamlit Python app" in system_prompt:
+        return PROTOTYPE["python"]
+    return PROTOTYPE["marketplace"]
+
+
+class FakeGroq:
+    """Stands in for groq.Groq — same call shape, canned content, configurable latency."""
+
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.models = SimpleNamespace(list=lambda: SimpleNamespace(data=[]))
+
+    def _create(self, model=None, messages=(), max_tokens=None, **kwargs):
+        time.sleep(llm_latency)
+        content = fake_reply(messages[0]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+# ─────────────────────────────────────────────
+# SESSION DRIVER
+# ─────────────────────────────────────────────
+def deep_sizeof(obj, seen=None) -> int:
+    """Approximate retained size of a session_state value, following containers."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def session_state_bytes(at) -> int:
+    return deep_sizeof(dict(at.session_state.filtered_state))
+
+
+def init_worker(latency: float):
+    """Worker-process setup: mock LLM, simulated latency, Streamlit imported before timing starts."""
+    global llm_latency
+    llm_latency = latency
+    mock.patch("groq.Groq", FakeGroq).start()
+    from streamlit.testing.v1 import AppTest   # noqa: F401
+
+
+def run_session(session_no: int, timeout: float) -> dict:
+    """
+    Drive one student from Step 1 to Step 5 (one session per worker process at a time).
+    Returns latencies, CPU seconds used and peak state size.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    cpu_start = time.process_time()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    latencies, peak_state = [], 0
+
+    def interact(action=None):
+        nonlocal peak_state
+        if action:
+            action()
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+        if at.exception or at.error:
+            problem = at.exception[0].message if at.exception else at.error[0].value
+            raise RuntimeError(f"stage {at.session_state['stage']}: {problem}")
+        peak_state = max(peak_state, session_state_bytes(at))
+
+    def click(label):
+        for button in at.button:
+            if button.label == label:
+                return lambda: button.click()
+        raise RuntimeError(f"button {label!r} not found at stage {at.session_state['stage']}")
+
+    def fill_idea():
+        at.text_area[0].input(f"Homework deadline tracker #{session_no}")
+        at.radio[0].set_value(IDEA_TYPES[session_no % len(IDEA_TYPES)])
+        at.button[0].click()   # the form submit button is the only button on Step 1
+
+    interact()                                                     # Step 1 renders
+    interact(fill_idea)                                            # → Step 2 refinement
+    interact(click("Start Mentor Session →"))                      # → Step 3 questions
+    if any(b.label == "Submit All Answers →" for b in at.button):  # batched mentor review
+        for i in range(len(QUESTIONS)):
+            at.text_area(key=f"batch_answer_{i}").input("I will interview ten classmates first.")
+        interact(click("Submit All Answers →"))
+    else:
+        for _ in QUESTIONS:
+            at.text_area[0].input("I will interview ten classmates first.")
+            interact(click("Submit Answer →"))
+    interact(click("📊 See Score & Improved Blueprint →"))         # → Step 4
+    interact(click("🛠 Generate Prototype →"))                     # → Step 5
+    return {"latencies": latencies, "cpu_s": time.process_time() - cpu_start, "state_bytes": peak_state}
+
+
+# ─────────────────────────────────────────────
+# RAMP + REPORT
+# ─────────────────────────────────────────────
+def run_level(concurrency: int, sessions: int, timeout: float, latency: float) -> dict:
+    results, errors = [], []
+    # Fresh spawned workers per level: no state or warm caches carried between levels
+    with ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=(latency,)) as pool:
+        list(pool.map(int, range(concurrency)))   # spawn the workers before the clock starts
+        wall_start = time.perf_counter()
+        futures = [pool.submit(run_session, n, timeout) for n in range(sessions)]
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+        wall = time.perf_counter() - wall_start
+
+    cpu = sum(r["cpu_s"] for r in results)
+    latencies = sorted(l for r in results for l in r["latencies"])
+    states = [r["state_bytes"] for r in results]
+    done = len(results)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else 0.0
+
+    return {
+        "concurrency":          concurrency,
+        "sessions":             done,
+        "errors":               errors,
+        "wall_s":               wall,
+        "cpu_s":                cpu,
+        "sessions_per_s":       done / wall if wall else 0.0,
+        "interactions_per_s":   len(latencies) / wall if wall else 0.0,
+        "latency_p50_ms":       pct(50) * 1000,
+        "latency_p95_ms":       pct(95) * 1000,
+        "latency_max_ms":       (latencies[-1] if latencies else 0.0) * 1000,
+        "cpu_per_rerun_ms":     cpu / len(latencies) * 1000 if latencies else 0.0,
+        "cpu_per_session_s":    cpu / done if done else 0.0,
+        "state_kb_mean":        statistics.mean(states) / 1024 if states else 0.0,
+        "state_kb_max":         max(states) / 1024 if states else 0.0,
+    }
+
+
+def print_report(levels: list, session_minutes: float) -> bool:
+    """Print the level table and capacity estimate. Returns False if any level had errors."""
+    header = (f"{'conc':>5} {'done':>5} {'err':>4} {'sess/s':>7} {'int/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'max ms':>8} {'cpu/rerun ms':>13} {'state KB':>9}")
+    print(header)
+    print("─" * len(header))
+    for r in levels:
+        print(f"{r['concurrency']:>5} {r['sessions']:>5} {len(r['errors']):>4} {r['sessions_per_s']:>7.2f} "
+              f"{r['interactions_per_s']:>7.1f} {r['latency_p50_ms']:>8.0f} {r['latency_p95_ms']:>8.0f} "
+              f"{r['latency_max_ms']:>8.0f} {r['cpu_per_rerun_ms']:>13.1f} {r['state_kb_mean']:>9.1f}")
+
+    for r in levels:
+        for e in r["errors"][:3]:
+            print(f"  ! concurrency {r['concurrency']}: {e}")
+
+    failed = [r["concurrency"] for r in levels if r["errors"]]
+    clean = [r for r in levels if r["sessions"] and not r["errors"]]
+    print()
+    if failed:
+        print(f"Levels with errors (excluded from capacity): {', '.join(map(str, failed))}")
+    if not clean:
+        print("No level completed without errors — no capacity estimate.")
+        return not failed
+    # The most loaded error-free level gives the most honest CPU cost per session
+    best = max(clean, key=lambda r: r["concurrency"])
+    cpu_per_session = best["cpu_per_session_s"]
+    print(f"Capacity from concurrency:   {best['concurrency']}")
+    print(f"CPU per full session:        {cpu_per_session:.2f} s")
+    if cpu_per_session:
+        print(f"Sessions per core per hour:  {3600 / cpu_per_session:,.0f}")
+        print(f"Concurrent students / core:  {session_minutes * 60 / cpu_per_session:,.0f} "
+              f"(assuming a {session_minutes:g}-minute session)")
+    print(f"Peak session_state per student: {max(r['state_kb_max'] for r in clean):.1f} KB")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrency levels to ramp through")
+    parser.add_argument("--sessions-per-worker", type=int, default=2, help="sessions run per concurrent worker")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--session-minutes", type=float, default=20.0, help="real session length for capacity")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout in seconds")
+    parser.add_argument("--json", dest="json_path", help="also write the raw results to this file")
+    args = parser.parse_args()
+
+    # Keep load-test scores and artifacts out of the real stores
+    os.environ.setdefault("SCORE_STORE_DIR", tempfile.mkdtemp(prefix="loadtest_scores_"))
+    os.environ.setdefault("ARTIFACT_STORE_DIR", tempfile.mkdtemp(prefix="loadtest_artifacts_"))
+
+    levels = []
+    for concurrency in (int(c) for c in args.levels.split(",")):
+        print(f"… concurrency {concurrency}", file=sys.stderr)
+        levels.append(run_level(concurrency, concurrency * args.sessions_per_worker, args.timeout,
+                                args.llm_latency))
+
+    ok = print_report(levels, args.session_minutes)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(levels, f, indent=2)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Preview server — serves generated HTML prototypes straight from the artifact store.
+
+GET /preview/<handle>.html returns the page stored under that content hash, with
+the hash as ETag and a long immutable Cache-Control (add ?download=1 to get it as an
+attachment). The Stage 5 iframe then only carries a URL: the browser reuses the
+cached page across reruns and tabs, and students with identical prototypes share
+one cached copy. The stored zlib blob is sent as-is (Content-Encoding: deflate)
+when the browser accepts it.
+
+Opt-in: the app only uses it when PREVIEW_PUBLIC_URL is set to an address the
+students' browsers can reach — normally a path on the app's own HTTPS origin that
+the reverse proxy forwards to PREVIEW_HOST:PREVIEW_PORT (a plain-http or localhost
+URL would be blocked or point at the student's own machine).
+"""
+import os
+import re
+import threading
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from artifact_store import STORE_DIR, get_compressed
+
+PREVIEW_HOST = os.getenv("PREVIEW_HOST", "127.0.0.1")
+PREVIEW_PORT = int(os.getenv("PREVIEW_PORT", "8601"))
+# URL the *browser* uses to reach this server; empty = previews are embedded inline
+PREVIEW_PUBLIC_URL = os.getenv("PREVIEW_PUBLIC_URL", "").rstrip("/")
+
+PREVIEW_PATH_RE = re.compile(r"/preview/([0-9a-f]{64})\.html")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+HEALTH_BODY = b"builder-school-preview ok"
+
+_server = None
+_lock = threading.Lock()
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    server_version = "BuilderSchoolPreview/1.0"
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool):
+        url = urlsplit(self.path)
+        path = url.path
+        if path == "/healthz":
+            return self._reply(200, HEALTH_BODY, {"Content-Type": "text/plain"}, send_body)
+
+        match = PREVIEW_PATH_RE.fullmatch(path)
+        if not match:
+            return self._reply(404, b"Not found", {"Content-Type": "text/plain"}, send_body)
+
+        handle = match.group(1)
+        cache_headers = {"ETag": f'"{handle}"', "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        # Content never changes for a handle, so any matching validator is a hit
+        if_none_match = self.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or f'"{handle}"' in if_none_match:
+            return self._reply(304, b"", cache_headers, send_body=False)
+
+        try:
+            blob = get_compressed(handle, self.server.store_dir)
+        except FileNotFoundError:
+            return self._reply(404, b"Preview not found", {"Content-Type": "text/plain"}, send_body)
+
+        headers = {"Content-Type": "text/html; charset=utf-8", **cache_headers}
+        if parse_qs(url.query).get("download") == ["1"]:
+            headers["Content-Disposition"] = 'attachment; filename="landing_page.html"'
+        if "deflate" in self.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "deflate"
+            body = blob
+        else:
+            body = zlib.decompress(blob)
+        self._reply(200, body, headers, send_body)
+
+    def _reply(self, status: int, body: bytes, headers: dict, send_body: bool):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # one line per iframe load would drown the Streamlit log
+
+
+def _already_running() -> bool:
+    """True if our preview server (e.g. from another replica process) already owns the port."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{PREVIEW_PORT}/healthz", timeout=1) as r:
+            return r.read() == HEALTH_BODY
+    except OSError:
+        return False
+
+
+def start_preview_server(store_dir: str = STORE_DIR):
+    """
+    Start the server on a daemon thread (once per process) and return the public
+    base URL, or None if PREVIEW_PUBLIC_URL is unset or the server cannot be
+    started — callers then embed the HTML inline.
+    """
+    global _server
+    if not PREVIEW_PUBLIC_URL:
+        return None
+    with _lock:
+        if _server is not None:
+            return PREVIEW_PUBLIC_URL
+        try:
+            server = ThreadingHTTPServer((PREVIEW_HOST, PREVIEW_PORT), PreviewHandler)
+        except OSError:
+            return PREVIEW_PUBLIC_URL if _already_running() else None
+        server.daemon_threads = True
+        server.store_dir = store_dir
+        threading.Thread(target=server.serve_forever, name="preview-server", daemon=True).start()
+        _server = server
+        return PREVIEW_PUBLIC_URL
+
+
+def preview_url(base_url: str, handle: str, download: bool = False) -> str:
+    return f"{base_url}/preview/{handle}.html" + ("?download=1" if download else "")
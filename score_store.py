@@ -0,0 +1,192 @@
+"""
+Score analytics store — keeps every completed readiness score after the session ends.
+
+Each scored session appends one fixed-width NumPy record to scores.bin and its
+improved blueprint as one line of blueprints.jsonl; the record keeps the line's
+byte offset and length, so a blueprint is read with one seek. Reads memory-map
+scores.bin, so cohort aggregates run as vectorized NumPy ops over columns instead
+of re-parsing JSON exports.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+try:
+    import fcntl   # cross-process append lock (POSIX); threads are covered by _write_lock
+except ImportError:
+    fcntl = None
+
+import numpy as np
+
+# Next to this module, so the app and the dashboard find it whatever directory they start from
+STORE_DIR = os.getenv("SCORE_STORE_DIR",
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), "score_store"))
+SCORES_FILE = "scores.bin"
+BLUEPRINTS_FILE = "blueprints.jsonl"
+
+DIMENSIONS = ["problem_clarity", "monetization_clarity", "differentiation", "student_feasibility"]
+DIMENSION_LABELS = {
+    "problem_clarity":      "Problem Clarity",
+    "monetization_clarity": "Monetization",
+    "differentiation":      "Differentiation",
+    "student_feasibility":  "Feasibility",
+    "overall":              "Overall",
+}
+IDEA_TYPES = ["App or Website", "AI Tool", "Marketplace"]
+UNKNOWN_CODE = 255
+PERCENTILES = [10, 25, 50, 75, 90]
+
+# One record per scored session. Written with a single append, so concurrent
+# writers (threads or replicas sharing the directory) never interleave a record.
+SCORE_DTYPE = np.dtype([
+    ("session_id",           "<u8"),   # one id per student session — re-scores repeat it
+    ("timestamp",            "<f8"),
+    ("student_class",        "u1"),
+    ("idea_type",            "u1"),    # index into IDEA_TYPES, UNKNOWN_CODE otherwise
+    ("problem_clarity",      "u1"),
+    ("monetization_clarity", "u1"),
+    ("differentiation",      "u1"),
+    ("student_feasibility",  "u1"),
+    ("overall",              "<f4"),
+    ("blueprint_offset",     "<u8"),   # byte range of the blueprint line in blueprints.jsonl
+    ("blueprint_length",     "<u4"),
+])
+
+_write_lock = threading.Lock()
+
+
+def _clamp_score(value) -> int:
+    """LLM scores sometimes arrive as '7' or 7.0 — coerce to an int in 1-10."""
+    return min(10, max(1, int(round(float(value)))))
+
+
+def record_session(session_id: int, score: dict, blueprint: dict, student_class: str,
+                   idea_type: str, store_dir: str = STORE_DIR):
+    """
+    Append one completed score + blueprint to the store. Scoring the same session
+    again appends a newer record with the same id (see latest_per_session).
+    Raises ValueError if the score is missing a dimension or is not a finite number.
+    """
+    try:
+        dims = [_clamp_score(score[d]) for d in DIMENSIONS]
+        overall = float(score.get("overall", sum(dims) / len(dims)))
+        if not math.isfinite(overall):
+            raise ValueError(f"overall is {overall}")
+        overall = min(10.0, max(1.0, overall))   # same 1-10 range as the dimensions
+        cls = int(student_class)
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"score cannot be stored: {e}") from e
+
+    record = np.zeros(1, dtype=SCORE_DTYPE)
+    record["session_id"] = session_id
+    record["timestamp"] = time.time()
+    record["student_class"] = cls
+    record["idea_type"] = IDEA_TYPES.index(idea_type) if idea_type in IDEA_TYPES else UNKNOWN_CODE
+    for d, v in zip(DIMENSIONS, dims):
+        record[d] = v
+    record["overall"] = overall
+
+    line = (json.dumps({"session_id": session_id, "blueprint": blueprint}, ensure_ascii=False)
+            + "\n").encode("utf-8")
+    record["blueprint_length"] = len(line)
+
+    os.makedirs(store_dir, exist_ok=True)
+    with _write_lock, open(os.path.join(store_dir, BLUEPRINTS_FILE), "ab") as bp_file:
+        if fcntl is not None:
+            fcntl.flock(bp_file, fcntl.LOCK_EX)   # held until close — offsets stay exact
+        record["blueprint_offset"] = bp_file.seek(0, os.SEEK_END)
+        bp_file.write(line)
+        bp_file.flush()
+        with open(os.path.join(store_dir, SCORES_FILE), "ab") as f:
+            f.write(record.tobytes())
+
+
+def load_scores(store_dir: str = STORE_DIR) -> np.ndarray:
+    """Memory-map all stored records (read-only). Empty array when nothing is stored yet."""
+    path = os.path.join(store_dir, SCORES_FILE)
+    try:
+        n = os.path.getsize(path) // SCORE_DTYPE.itemsize   # ignore a half-written tail record
+    except OSError:
+        n = 0
+    if n == 0:
+        return np.zeros(0, dtype=SCORE_DTYPE)
+    return np.memmap(path, dtype=SCORE_DTYPE, mode="r", shape=(n,))
+
+
+def latest_per_session(scores: np.ndarray) -> np.ndarray:
+    """Keep only the newest record of each session id (re-scores replace earlier ones)."""
+    if len(scores) == 0:
+        return scores
+    order = np.argsort(scores["timestamp"], kind="stable")
+    newest_first = order[::-1]
+    _, first = np.unique(scores["session_id"][newest_first], return_index=True)
+    return scores[np.sort(newest_first[first])]
+
+
+def filter_scores(scores: np.ndarray, classes: list = None, idea_types: list = None,
+                  since: float = None) -> np.ndarray:
+    """
+    Boolean-mask selection by class, idea type and start timestamp.
+    None means "no filter"; an empty list selects nothing.
+    """
+    mask = np.ones(len(scores), dtype=bool)
+    if classes is not None:
+        mask &= np.isin(scores["student_class"], [int(c) for c in classes])
+    if idea_types is not None:
+        codes = [IDEA_TYPES.index(t) for t in idea_types if t in IDEA_TYPES]
+        mask &= np.isin(scores["idea_type"], codes)
+    if since is not None:
+        mask &= scores["timestamp"] >= since
+    return scores[mask]
+
+
+def cohort_summary(scores: np.ndarray) -> dict:
+    """
+    Vectorized cohort aggregates:
+      count, per-dimension mean and percentiles, overall histogram (1-10),
+      and per-class session counts + dimension means.
+    """
+    columns = DIMENSIONS + ["overall"]
+    n = len(scores)
+    if n == 0:
+        return {"count": 0, "columns": columns}
+
+    matrix = np.column_stack([scores[c].astype(np.float32) for c in columns])   # n × 5
+    classes = scores["student_class"].astype(np.intp)
+    class_counts = np.bincount(classes, minlength=13)
+    present = np.nonzero(class_counts)[0]
+    class_means = np.stack([
+        np.bincount(classes, weights=matrix[:, j], minlength=13)[present] / class_counts[present]
+        for j in range(len(columns))
+    ], axis=1)
+
+    overall_bins = np.clip(np.rint(matrix[:, -1]).astype(np.intp), 1, 10)
+
+    return {
+        "count":         n,
+        "columns":       columns,
+        "mean":          matrix.mean(axis=0),
+        "percentiles":   np.percentile(matrix, PERCENTILES, axis=0),   # len(PERCENTILES) × 5
+        "overall_hist":  np.bincount(overall_bins, minlength=11)[1:],  # sessions scoring 1..10
+        "classes":       present,
+        "class_counts":  class_counts[present],
+        "class_means":   class_means,                                  # len(classes) × 5
+    }
+
+
+def load_blueprints(records: np.ndarray, store_dir: str = STORE_DIR) -> dict:
+    """Read the blueprints of a few records by seeking to their stored byte ranges."""
+    found = {}
+    path = os.path.join(store_dir, BLUEPRINTS_FILE)
+    if len(records) == 0 or not os.path.exists(path):
+        return found
+    with open(path, "rb") as f:
+        for row in records:
+            f.seek(int(row["blueprint_offset"]))
+            try:
+                found[int(row["session_id"])] = json.loads(f.read(int(row["blueprint_length"])))["blueprint"]
+            except (json.JSONDecodeError, KeyError, UnicodeDecodeError):
+                continue
+    return found
@@ -0,0 +1,108 @@
+"""
+Boot entrypoint — warms the process before Streamlit starts accepting students.
+
+    python startup.py [--tiny-call] [--no-run] [-- <streamlit run options>]
+
+Inside this one process it:
+  1. imports the heavy modules (Streamlit, Groq SDK, httpx, pydantic, NumPy) and times each,
+  2. builds the shared LLM backends and opens their HTTP connections (DNS + TLS),
+     optionally with a 1-token model call (--tiny-call or PREWARM_TINY_CALL=1);
+     idle connections are kept for LLM_KEEPALIVE_SECONDS (default 300), not httpx's 5 s,
+  3. starts the prototype preview server (if PREVIEW_PUBLIC_URL is set),
+  4. then hands over to `streamlit run app.py`.
+
+Streamlit's health endpoint (/_stcore/health) only answers after step 4, so an
+autoscaled replica is marked ready only once it is warm. Timings go to stderr.
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+HEAVY_MODULES = ["streamlit", "pydantic", "httpx", "groq", "numpy"]
+APP_MODULES = ["artifact_store", "llm_backends", "preview_server", "score_store"]
+
+log = logging.getLogger("startup")
+
+
+def timed(label: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    log.info("%-28s %8.1f ms", label, (time.perf_counter() - start) * 1000)
+    return result
+
+
+def import_heavy_modules():
+    # Third-party first, then app-side modules, so the first script run finds them in sys.modules
+    for name in HEAVY_MODULES + APP_MODULES:
+        try:
+            timed(f"import {name}", importlib.import_module, name)
+        except ImportError as e:
+            log.warning("import %s failed: %s", name, e)
+
+
+def backends_in_use() -> list:
+    """Same environment switches app.py reads: LLM_STAGE_BACKENDS and LLM_FALLBACK."""
+    names = {"groq"}
+    for pair in filter(None, os.getenv("LLM_STAGE_BACKENDS", "").split(",")):
+        names.add(pair.partition("=")[2].strip())
+    if os.getenv("LLM_FALLBACK"):
+        names.add(os.getenv("LLM_FALLBACK"))
+    return sorted(names)
+
+
+def prewarm_backends(tiny_call: bool):
+    from llm_backends import GROQ_MODEL, prewarm
+
+    for name in backends_in_use():
+        if name == "groq":
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                log.warning("GROQ_API_KEY not set — Groq connection not pre-warmed (key is in app.py)")
+                continue
+            settings = {"api_key": api_key, "model": GROQ_MODEL}   # must match app.py to be reused
+        else:
+            settings = {}
+        try:
+            timings = prewarm(name, tiny_call=tiny_call, **settings)
+        except Exception as e:
+            log.warning("pre-warm %s failed, first call will connect cold: %s", name, e)
+            continue
+        for step, ms in timings.items():
+            log.info("%-28s %8.1f ms", f"{name} {step}", ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tiny-call", action="store_true",
+                        default=os.getenv("PREWARM_TINY_CALL", "0") == "1",
+                        help="also run a 1-token completion per backend (uses a little quota)")
+    parser.add_argument("--no-run", action="store_true", help="only report boot timings, don't start Streamlit")
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER, help="passed to `streamlit run` after --")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[startup] %(message)s", stream=sys.stderr)
+
+    boot = time.perf_counter()
+    import_heavy_modules()
+    prewarm_backends(args.tiny_call)
+
+    if os.getenv("PREVIEW_PUBLIC_URL"):
+        from preview_server import start_preview_server
+        if timed("start preview server", start_preview_server) is None:
+            log.warning("preview server unavailable — previews will be embedded inline")
+    log.info("%-28s %8.1f ms", "total warm-up", (time.perf_counter() - boot) * 1000)
+
+    if args.no_run:
+        return
+
+    extra = args.streamlit_args[1:] if args.streamlit_args[:1] == ["--"] else args.streamlit_args
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", APP_PATH, *extra]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
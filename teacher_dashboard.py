@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from score_store import (DIMENSION_LABELS, IDEA_TYPES, PERCENTILES, cohort_summary,
+                         filter_scores, latest_per_session, load_blueprints, load_scores)
+
+# ─────────────────────────────────────────────
+# CONFIG
+# ─────────────────────────────────────────────
+# Run separately from the student app:  streamlit run teacher_dashboard.py
+st.set_page_config(page_title="Builder School — Teacher Dashboard", page_icon="📊", layout="wide")
+
+st.title("📊 Teacher Dashboard")
+st.caption("Readiness scores from every completed Builder School session")
+
+# A student who re-scores after revisiting the mentor session counts once, with the latest score
+scores = latest_per_session(load_scores())
+if len(scores) == 0:
+    st.info("No scored sessions yet — scores appear here once students finish Step 4.")
+    st.stop()
+
+# ─────────────────────────────────────────────
+# SIDEBAR — COHORT FILTERS
+# ─────────────────────────────────────────────
+with st.sidebar:
+    st.header("🔎 Cohort")
+    all_classes = [str(c) for c in np.unique(scores["student_class"])]
+    classes = st.multiselect("Class", all_classes, default=all_classes)
+    idea_types = st.multiselect("Idea Type", IDEA_TYPES, default=IDEA_TYPES)
+    window = st.selectbox("Period", ["All time", "Last 7 days", "Last 30 days"])
+
+since = {"Last 7 days": 7, "Last 30 days": 30}.get(window)
+if since is not None:
+    since = time.time() - since * 86400
+
+cohort = filter_scores(scores, classes, idea_types, since)
+summary = cohort_summary(cohort)
+if summary["count"] == 0:
+    st.warning("No sessions match these filters.")
+    st.stop()
+
+labels = [DIMENSION_LABELS[c] for c in summary["columns"]]
+
+# ─────────────────────────────────────────────
+# HEADLINE NUMBERS
+# ─────────────────────────────────────────────
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Sessions", f"{summary['count']:,}")
+col2.metric("Mean Overall", f"{summary['mean'][-1]:.1f}/10")
+col3.metric("Median Overall", f"{summary['percentiles'][PERCENTILES.index(50)][-1]:.1f}/10")
+col4.metric("Weakest Dimension", labels[int(np.argmin(summary["mean"][:-1]))])
+
+st.divider()
+
+# ─────────────────────────────────────────────
+# DISTRIBUTIONS
+# ─────────────────────────────────────────────
+col_a, col_b = st.columns(2)
+with col_a:
+    st.markdown("#### Overall Score Distribution")
+    st.bar_chart(pd.DataFrame({"Sessions": summary["overall_hist"]}, index=range(1, 11)))
+with col_b:
+    st.markdown("#### Per-Dimension Percentiles")
+    st.dataframe(
+        pd.DataFrame(summary["percentiles"], index=[f"p{p}" for p in PERCENTILES], columns=labels).round(1),
+        use_container_width=True,
+    )
+    st.markdown("#### Mean by Dimension")
+    st.bar_chart(pd.DataFrame({"Mean": summary["mean"][:-1]}, index=labels[:-1]))
+
+st.divider()
+
+# ─────────────────────────────────────────────
+# PER-CLASS COMPARISON
+# ─────────────────────────────────────────────
+st.markdown("#### Class Comparison")
+by_class = pd.DataFrame(summary["class_means"], columns=labels,
+                        index=[f"Class {c}" for c in summary["classes"]]).round(2)
+by_class.insert(0, "Sessions", summary["class_counts"])
+st.dataframe(by_class, use_container_width=True)
+st.bar_chart(by_class[labels[:-1]])
+
+# ─────────────────────────────────────────────
+# RECENT BLUEPRINTS
+# ─────────────────────────────────────────────
+with st.expander("🔄 Latest improved blueprints", expanded=False):
+    latest = cohort[np.argsort(cohort["timestamp"])[-10:][::-1]]
+    blueprints = load_blueprints(latest)
+    for row in latest:
+        bp = blueprints.get(int(row["session_id"]))
+        if not bp:
+            continue
+        st.markdown(f"**{bp.get('improved_name', 'Untitled')}** — Class {row['student_class']}, "
+                    f"overall {row['overall']:.1f}/10")
+        st.caption(bp.get("key_improvement", ""))
@@ -0,0 +1,76 @@
+from context_builder import (CONTEXT_BUDGETS, FIELD_LABELS, STAGE_FIELDS, build_context,
+                             build_session_context, count_tokens, trim_to_tokens)
+
+STRUCTURED = {
+    "problem_statement": "Students forget homework deadlines. Teachers chase them by hand.",
+    "target_user": "Class 9-10 students",
+    "revenue_model": "Schools pay a yearly licence per class.",
+    "core_features": ["Deadline reminders", "Streak tracker", "Teacher dashboard"],
+}
+ANSWERS = [
+    "I asked twelve classmates and nine missed a deadline last month.",
+    "Schools pay because teachers spend hours chasing late work.",
+    "Existing planners are generic and nobody opens them.",
+]
+FEEDBACK = [
+    "Good start on evidence. The sample is small. Survey two more classes this week.",
+    "Clear buyer. Price is unproven. Ask one principal what they would pay.",
+    "Fair point. Differentiation is thin. Show one feature planners cannot copy.",
+]
+
+
+def test_trim_keeps_whole_leading_sentences():
+    text = "One two three. Four five six. Seven eight nine."
+    assert trim_to_tokens(text, 9) == "One two three. Four five six."
+
+
+def test_trim_hard_cut_counts_the_ellipsis():
+    text = " ".join(["word"] * 50)
+    for budget in (2, 5, 24):
+        trimmed = trim_to_tokens(text, budget)
+        assert trimmed.endswith(" …")
+        assert count_tokens(trimmed) == budget
+    assert trim_to_tokens(text, 1) == ""
+    assert trim_to_tokens(text, 0) == ""
+
+
+def test_trim_leaves_short_text_alone():
+    assert trim_to_tokens("  Short idea.  ", 10) == "Short idea."
+
+
+def test_long_idea_keeps_every_mentor_exchange():
+    idea = "A homework planner that nudges students before deadlines. " * 250   # ~2000 words
+    fields = build_session_context(idea, STRUCTURED, ANSWERS, FEEDBACK)
+    for stage in STAGE_FIELDS:
+        context = build_context(stage, fields)
+        assert count_tokens(context) <= CONTEXT_BUDGETS[stage]
+        for name in STAGE_FIELDS[stage]:
+            if fields.get(name):
+                assert FIELD_LABELS[name] in context, (stage, name)
+
+    context = build_context("readiness_score", fields)
+    for i, (answer, note) in enumerate(zip(ANSWERS, FEEDBACK), 1):
+        assert f"Q{i} — Student said: {answer}" in context
+        assert f"Mentor noted: {note}" in context
+    assert "Revenue model: Schools pay a yearly licence per class." in context
+
+
+def test_tight_budget_gives_each_exchange_a_share():
+    long_answer = " ".join(["detail"] * 300)
+    fields = build_session_context("Homework planner.", STRUCTURED,
+                                   [long_answer, ANSWERS[1], ANSWERS[2]], FEEDBACK)
+    context = build_context("improved_blueprint", fields)
+    assert count_tokens(context) <= CONTEXT_BUDGETS["improved_blueprint"]
+    for i in (1, 2, 3):
+        assert f"Q{i} — Student said:" in context
+
+
+def test_only_identical_fields_are_deduplicated():
+    fields = build_session_context("Homework planner", dict(STRUCTURED, target_user="Homework planner"))
+    context = build_context("mentor_questions", fields)
+    assert "Target user" not in context
+
+    # A field that merely contains another one's text is kept
+    fields = build_session_context("Planner", dict(STRUCTURED, target_user="Planner users in Class 9"))
+    context = build_context("mentor_questions", fields)
+    assert "Target user: Planner users in Class 9" in context